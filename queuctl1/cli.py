@@ -6,33 +6,89 @@ ex: queuectl enqueue '{"id":"j1","command":"echo hi"}'
 from __future__ import annotations
 import argparse
 import json
-import time
-from multiprocessing import Process
+import os
 from typing import Optional
 
-from .storage import (
-    init, connect, enqueue, list_jobs, status,
-    dlq_list, dlq_retry, set_config, get_config
-)
-from .worker import run_worker
+# NOTE: storage / worker / multiprocessing are imported inside each command so
+# `queuectl status` etc. don't pay for modules only `worker start` needs.
+
+
+def _humanize(rows):
+    from .storage import format_ts, TS_COLS
+
+    # JSON boundary: Row -> dict here, and storage's epoch ms -> iso strings
+    out = []
+    for r in rows:
+        rec = dict(r)
+        for k in TS_COLS:
+            if k in rec:
+                rec[k] = format_ts(rec[k])
+        out.append(rec)
+    return out
+
+
+def _open_ro(db_arg):
+    # read-only commands: only bootstrap (a read-write init) when there's no db
+    # yet or it predates the current schema, so status/list don't open a writer
+    # next to running workers on every call
+    from .storage import DEFAULT_DB, init, connect_ro, close, needs_migration
+
+    if not os.path.exists(db_arg or DEFAULT_DB):
+        init(db_arg)
+        return connect_ro(db_arg)
+    ro = connect_ro(db_arg)
+    if needs_migration(ro):
+        close(ro)
+        init(db_arg)
+        ro = connect_ro(db_arg)
+    return ro
 
 
 # ---- commands ---------------------------------------------------------------
 
 def _cmd_enqueue(args):
-    init(args.db)
-    db = connect(args.db)
+    from .storage import init, connect, close, enqueue, enqueue_many
 
-    # job spec is passed as a raw JSON string; keep the interface identical to the prompt
-    payload = json.loads(args.json)
-    if "id" not in payload or "command" not in payload:
-        raise SystemExit("Job JSON must contain 'id' and 'command'")
+    # optional fast path for job JSON parsing (bulk enqueue); stdlib otherwise
+    try:
+        from orjson import loads as _loads
+    except ImportError:
+        _loads = json.loads
+
+    # job spec is passed as a raw JSON string; keep the interface identical to the prompt.
+    # bulk: a JSON array, or --file with one job object per line (NDJSON)
+    if args.file and args.json is not None:
+        raise SystemExit("Give either a job JSON string or --file, not both")
+    if args.file:
+        with open(args.file, encoding="utf-8") as fh:
+            payload = [_loads(line) for line in fh if line.strip()]
+    elif args.json is not None:
+        payload = _loads(args.json)
+    else:
+        raise SystemExit("Provide a job JSON string or --file")
+
+    jobs = payload if isinstance(payload, list) else [payload]
+    for job in jobs:
+        if not isinstance(job, dict) or "id" not in job or "command" not in job:
+            raise SystemExit("Job JSON must contain 'id' and 'command'")
 
-    enqueue(db, payload)
-    print(f"Enqueued job {payload['id']}")
+    init(args.db)
+    db = connect(args.db)
+    if isinstance(payload, dict):
+        enqueue(db, payload)
+        print(f"Enqueued job {payload['id']}")
+    else:
+        n = enqueue_many(db, jobs)
+        print(f"Enqueued {n} jobs")
+    close(db)
 
 
 def _cmd_worker_start(args):
+    import time
+    from multiprocessing import Process
+    from .storage import init
+    from .worker import run_worker
+
     init(args.db)
     procs = []
 
@@ -59,17 +115,18 @@ def _cmd_worker_stop(_args):
 
 
 def _cmd_status(args):
-    init(args.db)
-    db = connect(args.db)
+    from .storage import close, status
+
+    db = _open_ro(args.db)
     print(json.dumps(status(db), indent=2))
+    close(db)
+
 
 def _cmd_metrics(args):
     """Show overall job performance metrics."""
-    from .storage import connect, init
-    import json
+    from .storage import close
 
-    init(args.db)
-    db = connect(args.db)
+    db = _open_ro(args.db)
 
     row = db.execute("""
     SELECT
@@ -78,42 +135,54 @@ def _cmd_metrics(args):
         (SELECT COUNT(*) FROM dlq) AS failed,
         ROUND((SELECT AVG(duration_ms) FROM jobs), 2) AS avg_ms
 """).fetchone()
+    close(db)
 
-    keys = ["total", "success", "failed", "avg_ms"]
-    metrics = dict(zip(keys, row))
+    metrics = dict(row)
     print(json.dumps(metrics, indent=2))
 
 
 def _cmd_list(args):
-    init(args.db)
-    db = connect(args.db)
-    print(json.dumps(list_jobs(db, state=args.state), indent=2))
+    from .storage import close, list_jobs
+
+    db = _open_ro(args.db)
+    print(json.dumps(_humanize(list_jobs(db, state=args.state)), indent=2))
+    close(db)
 
 
 def _cmd_dlq_list(args):
-    init(args.db)
-    db = connect(args.db)
-    print(json.dumps(dlq_list(db), indent=2))
+    from .storage import close, dlq_list
+
+    db = _open_ro(args.db)
+    print(json.dumps(_humanize(dlq_list(db)), indent=2))
+    close(db)
 
 
 def _cmd_dlq_retry(args):
+    from .storage import init, connect, close, dlq_retry
+
     init(args.db)
     db = connect(args.db)
     dlq_retry(db, args.id)
+    close(db)
     print(f"Moved {args.id} from DLQ to pending.")
 
 
 def _cmd_config_set(args):
+    from .storage import init, connect, close, set_config
+
     init(args.db)
     db = connect(args.db)
     set_config(db, args.key, args.value)
+    close(db)
     print(f"Set {args.key}={args.value}")
 
 
 def _cmd_config_get(args):
-    init(args.db)
-    db = connect(args.db)
+    from .storage import close, get_config
+
+    db = _open_ro(args.db)
     val = get_config(db, args.key)
+    close(db)
     print(val if val is not None else "")
 
 
@@ -125,8 +194,9 @@ def _make_parser():
 
     sub = p.add_subparsers(dest="cmd", required=True)
 
-    sp = sub.add_parser("enqueue", help="Enqueue a job from JSON string")
-    sp.add_argument("json", help="e.g. '{\"id\":\"job1\",\"command\":\"echo hi\"}'")
+    sp = sub.add_parser("enqueue", help="Enqueue a job (or a JSON array of jobs) from JSON string")
+    sp.add_argument("json", nargs="?", help="e.g. '{\"id\":\"job1\",\"command\":\"echo hi\"}'")
+    sp.add_argument("--file", help="NDJSON file, one job object per line (bulk insert)")
     sp.set_defaults(func=_cmd_enqueue)
 
     wp = sub.add_parser("worker", help="Worker management")
@@ -5,28 +5,29 @@ sqlite only for now — simple + good enough.
 
 from __future__ import annotations
 import sqlite3
-from typing import Optional, Dict, List
+from contextlib import contextmanager
+from typing import Iterator, Optional, Dict, List
 from datetime import datetime, timezone
 import os
 import time
+from pathlib import Path
 
 # NOTE: keep DB path overridable via env for quick experiments
 DEFAULT_DB = os.environ.get("QUEUECTL_DB", os.path.join(os.getcwd(), "queuectl.db"))
 
 # schema (kept fairly small; evolve later if needed)
 SCHEMA_STMTS = [
-    "PRAGMA journal_mode=WAL",       # decent perf for concurrent readers
     """CREATE TABLE IF NOT EXISTS jobs (
         id TEXT PRIMARY KEY,
         command TEXT NOT NULL,
         state TEXT NOT NULL,
         attempts INTEGER NOT NULL DEFAULT 0,
         max_retries INTEGER NOT NULL DEFAULT 3,
-        created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL,
-        next_attempt_at TEXT,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        next_attempt_at INTEGER,
         last_error TEXT,
-        started_at TEXT,
+        started_at INTEGER,
         duration_ms INTEGER,
         timeout_seconds INTEGER DEFAULT 10
     )""",
@@ -35,51 +36,370 @@ SCHEMA_STMTS = [
         command TEXT NOT NULL,
         attempts INTEGER NOT NULL,
         max_retries INTEGER NOT NULL,
-        failed_at TEXT NOT NULL,
+        failed_at INTEGER NOT NULL,
         last_error TEXT
     )""",
     """CREATE TABLE IF NOT EXISTS workers (
         pid INTEGER PRIMARY KEY,
-        started_at TEXT NOT NULL,
-        last_heartbeat TEXT NOT NULL
+        started_at INTEGER NOT NULL,
+        last_heartbeat INTEGER NOT NULL
     )""",
     """CREATE TABLE IF NOT EXISTS config (
         key TEXT PRIMARY KEY,
         value TEXT NOT NULL
-    )"""
+    )""",
+    # claim path: only pending/failed rows are ever candidates, taken oldest first,
+    # so the index walks created_at order and the claim needs no sort
+    """CREATE INDEX IF NOT EXISTS idx_jobs_claim
+        ON jobs(created_at)
+        WHERE state IN ('pending','failed')""",
+    # status() / list --state
+    "CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state)",
 ]
 
 
-def _stamp() -> str:
-    """UTC iso string with Z — I prefer this over naive datetimes."""
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+# timestamps are stored as INTEGER unix epoch ms: cheap to produce, compare and
+# sort. they only get turned into iso strings when shown to a human.
+TS_COLS = ("created_at", "updated_at", "next_attempt_at", "failed_at", "started_at", "last_heartbeat")
+
+
+def _stamp() -> int:
+    """now, as unix epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+def format_ts(ms: Optional[int]) -> Optional[str]:
+    """epoch ms -> UTC iso string with Z (None passes through)."""
+    if ms is None:
+        return None
+    if isinstance(ms, str):
+        return ms   # pre-INTEGER db that hasn't been through init() yet: already iso text
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)\
+        .isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# applied on *every* connection: most of these are per-connection settings,
+# so issuing them once in init() isn't enough.
+#   synchronous=NORMAL is safe under WAL and avoids an fsync per commit
+#   cache_size is in KiB when negative (-65536 -> 64 MB)
+_CONN_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA foreign_keys=ON;
+    PRAGMA wal_autocheckpoint=1000;
+"""
+
+# explicit projections: stable column order regardless of how the table was
+# migrated (ALTER TABLE appends), and no SELECT * expansion per call
+_JOB_COLS = (
+    "id", "command", "state", "attempts", "max_retries", "created_at", "updated_at",
+    "next_attempt_at", "last_error", "started_at", "duration_ms", "timeout_seconds",
+)
+_DLQ_COLS = ("id", "command", "attempts", "max_retries", "failed_at", "last_error")
+_JOB_PROJ = ", ".join(_JOB_COLS)
+_DLQ_PROJ = ", ".join(_DLQ_COLS)
+_SQL_LIST_JOBS = f"SELECT {_JOB_PROJ} FROM jobs ORDER BY created_at"
+_SQL_LIST_JOBS_BY_STATE = f"SELECT {_JOB_PROJ} FROM jobs WHERE state=? ORDER BY created_at"
+_SQL_JOB_BY_ID = f"SELECT {_JOB_PROJ} FROM jobs WHERE id=?"
+_SQL_DLQ_LIST = f"SELECT {_DLQ_PROJ} FROM dlq ORDER BY failed_at DESC"
+_SQL_DLQ_BY_ID = f"SELECT {_DLQ_PROJ} FROM dlq WHERE id=?"
+
+# hot-path statements, kept as module constants so every call hands sqlite3 the
+# same string and hits its per-connection statement cache (no re-parse)
+_SQL_GET_CONFIG = "SELECT value FROM config WHERE key=?"
+_SQL_HEARTBEAT = "UPDATE workers SET last_heartbeat=? WHERE pid=?"
+# claim SELECTs (this one and the subquery in _SQL_CLAIM_RETURNING): the leading
+# state IN (...) repeats what the OR implies, but a partial index is only usable
+# when the WHERE literally contains its condition. INDEXED BY pins the plan:
+# without fresh stats the planner prefers idx_jobs_state + a sort
+_SQL_CLAIM_SELECT = """
+    SELECT id FROM jobs INDEXED BY idx_jobs_claim
+     WHERE state IN ('pending','failed')
+       AND (state='pending'
+            OR (state='failed' AND (next_attempt_at IS NULL OR next_attempt_at <= ?)))
+     ORDER BY created_at
+     LIMIT 1
+"""
+_SQL_CLAIM_UPDATE = (
+    "UPDATE jobs SET state='processing', updated_at=? "
+    "WHERE id=? AND state!='processing'"
+)
+# sqlite >= 3.35: claim in one statement (pick + flip + hand back the row)
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_CLAIM_RETURNING = f"""
+    UPDATE jobs SET state='processing', updated_at=?
+     WHERE id = (
+        SELECT id FROM jobs INDEXED BY idx_jobs_claim
+         WHERE state IN ('pending','failed')
+           AND (state='pending'
+                OR (state='failed' AND (next_attempt_at IS NULL OR next_attempt_at <= ?)))
+         ORDER BY created_at
+         LIMIT 1
+     )
+    RETURNING {_JOB_PROJ}
+"""
+_SQL_UPDATE_SUCCESS = (
+    "UPDATE jobs SET state='completed', started_at=COALESCE(?, started_at), "
+    "duration_ms=COALESCE(?, duration_ms), updated_at=? WHERE id=?"
+)
+_SQL_UPDATE_FAILURE = (
+    "UPDATE jobs SET state='failed', attempts=?, next_attempt_at=?, last_error=?, "
+    "started_at=COALESCE(?, started_at), duration_ms=COALESCE(?, duration_ms), "
+    "updated_at=? WHERE id=?"
+)
+
+# read-only side: no journal/sync settings (nothing to write), just caching
+_RO_PRAGMAS = """
+    PRAGMA query_only=ON;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+"""
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3.Connection that remembers which db file it was opened on (wakeups, config cache)."""
+    db_path: str = ""
 
 
-def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+def connect(db_path: Optional[str] = None) -> Connection:
     path = db_path or DEFAULT_DB
     # autocommit-ish mode (isolation_level=None)
-    db = sqlite3.connect(path, timeout=10, isolation_level=None)
-    db.execute("PRAGMA foreign_keys=ON")
+    db = sqlite3.connect(
+        path, timeout=10, isolation_level=None, cached_statements=256, factory=Connection
+    )
+    db.db_path = path
+    db.executescript(_CONN_PRAGMAS)
+    # C-level row mapping (row["id"]); callers dict() it only when they need to
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def connect_ro(db_path: Optional[str] = None) -> Connection:
+    """
+    read-only connection (mode=ro) for status/list style commands and config lookups.
+    under WAL it never takes the write lock, so it can't get in a worker's way.
+    db must already exist (init() first).
+    """
+    path = db_path or DEFAULT_DB
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    db = sqlite3.connect(
+        uri, uri=True, timeout=10, isolation_level=None, cached_statements=256, factory=Connection
+    )
+    db.db_path = path
+    db.executescript(_RO_PRAGMAS)
+    db.row_factory = sqlite3.Row
     return db
 
 
+def close(db: sqlite3.Connection) -> None:
+    """let sqlite refresh planner stats for whatever we queried, then close."""
+    try:
+        if not db.execute("PRAGMA query_only").fetchone()[0]:
+            db.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass  # db gone / already closed; nothing useful to do here
+    db.close()
+
+
+@contextmanager
+def immediate(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    BEGIN IMMEDIATE ... COMMIT around the block (write lock taken upfront).
+    nests: if a transaction is already open we just ride on it.
+    """
+    if db.in_transaction:
+        yield db
+        return
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+# columns added to `jobs` after the first release; CREATE TABLE IF NOT EXISTS
+# won't touch an older db, so init() adds whichever are missing
+_JOBS_ADDED_COLS = {
+    "started_at": "INTEGER",
+    "duration_ms": "INTEGER",
+    "timeout_seconds": "INTEGER DEFAULT 10",
+}
+
+
+def _ms_expr(col: str) -> str:
+    # SQL turning an old iso TEXT timestamp into epoch ms (via julianday())
+    return (
+        f"CASE WHEN {col} IS NULL THEN NULL "
+        f"ELSE CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER) END"
+    )
+
+
+def _migrate_text_timestamps(db: sqlite3.Connection) -> None:
+    """
+    dbs created before timestamps became INTEGER epoch ms still declare the *_at
+    columns TEXT. sqlite can't change a column type in place, so rebuild those
+    tables from the current DDL and convert the values on the way across.
+    """
+    for table in ("jobs", "dlq", "workers"):
+        with immediate(db):
+            info = db.execute(f"PRAGMA table_info({table})").fetchall()
+            if not any(r["name"] in TS_COLS and r["type"].upper() == "TEXT" for r in info):
+                continue
+            ddl = next(x for x in SCHEMA_STMTS if x.startswith(f"CREATE TABLE IF NOT EXISTS {table} ("))
+            db.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            db.execute(ddl)
+            new_cols = {r["name"] for r in db.execute(f"PRAGMA table_info({table})")}
+            keep = [r["name"] for r in info if r["name"] in new_cols]
+            select = ", ".join(_ms_expr(c) if c in TS_COLS else c for c in keep)
+            db.execute(f"INSERT INTO {table}({', '.join(keep)}) SELECT {select} FROM {table}_old")
+            db.execute(f"DROP TABLE {table}_old")   # takes the old indexes with it
+
+
+def needs_migration(db: sqlite3.Connection) -> bool:
+    """True when init() still has work to do on this db (added columns, TEXT timestamps)."""
+    for table in ("jobs", "dlq", "workers"):
+        info = db.execute(f"PRAGMA table_info({table})").fetchall()
+        if not info:
+            return True     # table itself is missing
+        if any(r["name"] in TS_COLS and r["type"].upper() == "TEXT" for r in info):
+            return True
+        if table == "jobs" and not set(_JOBS_ADDED_COLS) <= {r["name"] for r in info}:
+            return True
+    return False
+
+
 def init(db_path: Optional[str] = None) -> None:
     db = connect(db_path)
+    try:
+        _init_schema(db)
+    finally:
+        close(db)
+
+
+def _init_schema(db: sqlite3.Connection) -> None:
+    _migrate_text_timestamps(db)
     with db:
         for s in SCHEMA_STMTS:
             db.execute(s)
+        have = {r["name"] for r in db.execute("PRAGMA table_info(jobs)")}
+        for col, decl in _JOBS_ADDED_COLS.items():
+            if col not in have:
+                db.execute(f"ALTER TABLE jobs ADD COLUMN {col} {decl}")
         # defaults; can be changed via CLI config
         if db.execute("SELECT 1 FROM config WHERE key='backoff_base'").fetchone() is None:
             db.execute("INSERT INTO config(key, value) VALUES('backoff_base','2')")
         if db.execute("SELECT 1 FROM config WHERE key='default_max_retries'").fetchone() is None:
             db.execute("INSERT INTO config(key, value) VALUES('default_max_retries','3')")
+        # prime planner stats once so the indexes above actually get picked;
+        # PRAGMA optimize in close() keeps them fresh after that
+        if db.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone() is None:
+            db.execute("ANALYZE")
+
+
+# ---- worker wakeup ----------------------------------------------------------
+# idle workers block on a named pipe next to the db ({db}.wake); enqueue pokes
+# it so pickup doesn't wait on a poll interval. no FIFOs on Windows -> callers
+# fall back to plain sleeping.
+
+def _wake_path(db_path: Optional[str]) -> str:
+    return f"{db_path or DEFAULT_DB}.wake"
+
+
+def open_wakeup(db_path: Optional[str] = None) -> Optional[tuple[int, int]]:
+    """
+    open (creating if needed) the wake pipe; returns (read_fd, write_fd), both non-blocking.
+    we hold a writer ourselves so select() doesn't report EOF forever when no enqueuer is around.
+    """
+    if not hasattr(os, "mkfifo"):
+        return None
+    path = _wake_path(db_path)
+    try:
+        os.mkfifo(path)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+    try:
+        rfd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        wfd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        os.close(rfd)
+        return None
+    return rfd, wfd
+
+
+def consume_wakeup(fd: int) -> None:
+    # one byte == one wakeup; leave the rest for the other idle workers
+    try:
+        os.read(fd, 1)
+    except BlockingIOError:
+        pass  # another worker got there first
+
+
+def drain_wakeup(fd: int) -> int:
+    """empty the wake pipe; returns how many pokes were pending."""
+    n = 0
+    while True:
+        try:
+            chunk = os.read(fd, 4096)
+        except BlockingIOError:
+            return n
+        if not chunk:
+            return n
+        n += len(chunk)
+
+
+def _notify_workers(db: sqlite3.Connection, n: int = 1) -> None:
+    """poke the wake pipe once per new job, but never more times than there are workers."""
+    path = getattr(db, "db_path", None)
+    if not path or not hasattr(os, "mkfifo"):
+        return
+    if n > 1:
+        n = min(n, db.execute("SELECT COUNT(*) FROM workers").fetchone()[0])
+        if n < 1:
+            return
+    try:
+        # ENXIO when no worker has the pipe open -> nobody to wake
+        fd = os.open(_wake_path(path), os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        return
+    try:
+        os.write(fd, b"\x01" * n)
+    except BlockingIOError:
+        pass  # pipe already full of pending wakeups
+    finally:
+        os.close(fd)
 
 
 # ---- config helpers ---------------------------------------------------------
+# config changes at human timescales, so reads go through a small per-process
+# cache: (db path, key) -> (value, fetched_at monotonic). set_config drops the key
+# here; other processes (e.g. running workers) pick the change up within the TTL.
+
+_CONFIG_TTL = 30.0
+_CONFIG_CACHE: Dict[tuple[str, str], tuple[Optional[str], float]] = {}
+
 
 def get_config(db: sqlite3.Connection, key: str) -> Optional[str]:
-    row = db.execute("SELECT value FROM config WHERE key=?", (key,)).fetchone()
-    return row[0] if row else None
+    ck = (getattr(db, "db_path", ""), key)
+    now = time.monotonic()
+    hit = _CONFIG_CACHE.get(ck)
+    if hit is not None and now - hit[1] < _CONFIG_TTL:
+        return hit[0]
+    row = db.execute(_SQL_GET_CONFIG, (key,)).fetchone()
+    val = row[0] if row else None
+    _CONFIG_CACHE[ck] = (val, now)
+    return val
 
 
 def set_config(db: sqlite3.Connection, key: str, value: str) -> None:
@@ -89,6 +409,7 @@ def set_config(db: sqlite3.Connection, key: str, value: str) -> None:
         "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
         (key, value)
     )
+    _CONFIG_CACHE.pop((getattr(db, "db_path", ""), key), None)
 
 
 # ---- job operations ---------------------------------------------------------
@@ -101,64 +422,98 @@ def enqueue(db: sqlite3.Connection, job: Dict) -> None:
         max_retries = int(get_config(db, "default_max_retries") or 3)
 
     db.execute(
-        "INSERT INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at) "
-        "VALUES(?,?,?,?,?,?,?)",
-        (job["id"], job["command"], "pending", 0, int(max_retries), now, now)
+        "INSERT INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, timeout_seconds) "
+        "VALUES(?,?,?,?,?,?,?,?)",
+        (job["id"], job["command"], "pending", 0, int(max_retries), now, now,
+         int(job.get("timeout_seconds") or 10))
     )
+    _notify_workers(db)
+
+
+def enqueue_many(db: sqlite3.Connection, jobs: List[Dict]) -> int:
+    """
+    bulk variant of enqueue(): one transaction + executemany.
+    now / default max_retries are resolved once for the whole batch.
+    """
+    now = _stamp()
+    default_retries = int(get_config(db, "default_max_retries") or 3)
+    rows = [
+        (
+            j["id"], j["command"], "pending", 0,
+            int(j["max_retries"] if j.get("max_retries") is not None else default_retries),
+            now, now, int(j.get("timeout_seconds") or 10)
+        )
+        for j in jobs
+    ]
+    with immediate(db):
+        db.executemany(
+            "INSERT INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, timeout_seconds) "
+            "VALUES(?,?,?,?,?,?,?,?)",
+            rows
+        )
+    if rows:
+        _notify_workers(db, len(rows))
+    return len(rows)
 
 
-def list_jobs(db: sqlite3.Connection, state: Optional[str] = None) -> List[Dict]:
+def list_jobs(db: sqlite3.Connection, state: Optional[str] = None) -> List[sqlite3.Row]:
     if state:
-        cur = db.execute("SELECT * FROM jobs WHERE state=? ORDER BY created_at", (state,))
+        cur = db.execute(_SQL_LIST_JOBS_BY_STATE, (state,))
     else:
-        cur = db.execute("SELECT * FROM jobs ORDER BY created_at")
-    cols = [c[0] for c in cur.description]
-    return [dict(zip(cols, r)) for r in cur.fetchall()]
+        cur = db.execute(_SQL_LIST_JOBS)
+    return cur.fetchall()
 
 
-def claim_next_job(db: sqlite3.Connection, worker_pid: int) -> Optional[Dict]:
+def claim_next_job(db: sqlite3.Connection, worker_pid: int) -> Optional[sqlite3.Row]:
     """
     find + claim one eligible job atomically.
-    uses BEGIN IMMEDIATE to avoid duplicate processing across workers.
+    uses BEGIN IMMEDIATE to avoid duplicate processing across workers;
+    if the caller already holds a transaction the claim joins it instead.
     """
     now = _stamp()
-    db.execute("BEGIN IMMEDIATE")
-    try:
-        cur = db.execute(
-            """
-            SELECT id FROM jobs
-             WHERE state='pending'
-                OR (state='failed' AND (next_attempt_at IS NULL OR next_attempt_at <= ?))
-             ORDER BY created_at
-             LIMIT 1
-            """,
-            (now,)
-        )
-        row = cur.fetchone()
+    with immediate(db):
+        if _HAS_RETURNING:
+            cur = db.execute(_SQL_CLAIM_RETURNING, (now, now))
+            # step the statement to completion before COMMIT (RETURNING rows are
+            # produced as the UPDATE runs); at most one row anyway
+            recs = cur.fetchall()
+            return recs[0] if recs else None
+
+        # older sqlite: SELECT -> UPDATE -> SELECT
+        row = db.execute(_SQL_CLAIM_SELECT, (now,)).fetchone()
         if not row:
-            db.execute("COMMIT")
             return None
 
         job_id = row[0]
-        db.execute(
-            "UPDATE jobs SET state='processing', updated_at=? "
-            "WHERE id=? AND state!='processing'",
-            (now, job_id)
-        )
-        db.execute("COMMIT")
+        db.execute(_SQL_CLAIM_UPDATE, (now, job_id))
 
-        cur = db.execute("SELECT * FROM jobs WHERE id=?", (job_id,))
-        cols = [c[0] for c in cur.description]
-        rec = cur.fetchone()
-        return dict(zip(cols, rec)) if rec else None
+        return db.execute(_SQL_JOB_BY_ID, (job_id,)).fetchone()
+
+
+def next_retry_in(db: sqlite3.Connection) -> Optional[float]:
+    """seconds until the earliest failed job becomes claimable again (None if there's none)."""
+    row = db.execute(
+        "SELECT MIN(next_attempt_at) FROM jobs WHERE state='failed' AND next_attempt_at IS NOT NULL"
+    ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return max(0.0, (row[0] - _stamp()) / 1000)
 
-    except Exception:
-        db.execute("ROLLBACK")
-        raise
+
+def update_job_success(
+    db: sqlite3.Connection,
+    job_id: str,
+    started_at: Optional[int] = None,
+    duration_ms: Optional[int] = None
+) -> None:
+    db.execute(
+        _SQL_UPDATE_SUCCESS,
+        (started_at, duration_ms, _stamp(), job_id)
+    )
 
 
-def update_job_success(db: sqlite3.Connection, job_id: str) -> None:
-    db.execute("UPDATE jobs SET state='completed', updated_at=? WHERE id=?", (_stamp(), job_id))
+# retries never get scheduled further out than this (base ^ attempts grows fast)
+MAX_BACKOFF_SECS = 3600
 
 
 def update_job_failure(
@@ -167,56 +522,54 @@ def update_job_failure(
     attempts: int,
     max_retries: int,
     backoff_base: int,
-    error: str
+    error: str,
+    started_at: Optional[int] = None,
+    duration_ms: Optional[int] = None
 ) -> str:
     """
     bump attempts; if exceeded -> move to DLQ, else schedule next_attempt_at with exponential backoff.
-      quick formula: delay = base ^ attempts
+      quick formula: delay = min(base ^ attempts, MAX_BACKOFF_SECS)
     """
     now = _stamp()
     attempts += 1
 
     if attempts > max_retries:
-        row = db.execute("SELECT id, command FROM jobs WHERE id=?", (job_id,)).fetchone()
-        if row:
-            db.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+        # copy straight across, then drop -- one transaction, no read-back into python
+        with immediate(db):
             db.execute(
                 "INSERT INTO dlq(id, command, attempts, max_retries, failed_at, last_error) "
-                "VALUES(?,?,?,?,?,?)",
-                (row[0], row[1], attempts - 1, max_retries, now, (error or "")[:500])
+                "SELECT id, command, ?, ?, ?, ? FROM jobs WHERE id=?",
+                (attempts - 1, max_retries, now, (error or "")[:500], job_id)
             )
+            db.execute("DELETE FROM jobs WHERE id=?", (job_id,))
         return "dead"
 
     # schedule next run (kept it simple for assignment)
-    delay_secs = backoff_base ** attempts
-    next_ts = int(time.time() + delay_secs)
-    next_iso = datetime.fromtimestamp(next_ts, tz=timezone.utc).replace(microsecond=0)\
-        .isoformat().replace("+00:00", "Z")
+    # base 2 (the default) is just a shift; 2^12 already exceeds the cap
+    if backoff_base == 2:
+        delay_secs = min(1 << min(attempts, 20), MAX_BACKOFF_SECS)
+    else:
+        delay_secs = min(backoff_base ** attempts, MAX_BACKOFF_SECS)
+    next_ts = now + int(delay_secs * 1000)
 
     db.execute(
-        "UPDATE jobs SET state='failed', attempts=?, next_attempt_at=?, last_error=?, updated_at=? WHERE id=?",
-        (attempts, next_iso, (error or "")[:500], now, job_id)
+        _SQL_UPDATE_FAILURE,
+        (attempts, next_ts, (error or "")[:500], started_at, duration_ms, now, job_id)
     )
     return "failed"
 
 
 # ---- dlq / status / workers -------------------------------------------------
 
-def dlq_list(db: sqlite3.Connection) -> List[Dict]:
-    cur = db.execute("SELECT * FROM dlq ORDER BY failed_at DESC")
-    cols = [c[0] for c in cur.description]
-    return [dict(zip(cols, r)) for r in cur.fetchall()]
+def dlq_list(db: sqlite3.Connection) -> List[sqlite3.Row]:
+    return db.execute(_SQL_DLQ_LIST).fetchall()
 
 
 def dlq_retry(db: sqlite3.Connection, job_id: str) -> None:
-    cur = db.execute("SELECT * FROM dlq WHERE id=?", (job_id,))
-    row = cur.fetchone()
-    if not row:
+    rec = db.execute(_SQL_DLQ_BY_ID, (job_id,)).fetchone()
+    if not rec:
         raise ValueError("Job not found in DLQ")
 
-    cols = [c[0] for c in cur.description]
-    rec = dict(zip(cols, row))
-
     now = _stamp()
     db.execute("DELETE FROM dlq WHERE id=?", (job_id,))
     db.execute(
@@ -224,14 +577,16 @@ def dlq_retry(db: sqlite3.Connection, job_id: str) -> None:
         "VALUES(?,?,?,?,?,?,?,?,?)",
         (rec["id"], rec["command"], "pending", 0, rec["max_retries"], now, now, None, None)
     )
+    _notify_workers(db)
 
 
 def status(db: sqlite3.Connection) -> Dict[str, int]:
-    out: Dict[str, int] = {}
-    for st in ("pending", "processing", "completed", "failed"):
-        out[st] = db.execute("SELECT COUNT(*) FROM jobs WHERE state=?", (st,)).fetchone()[0]
-    out["dead"] = db.execute("SELECT COUNT(*) FROM dlq").fetchone()[0]
-    out["workers"] = db.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+    # one grouped pass over jobs + one over dlq/workers (instead of a COUNT per state)
+    out: Dict[str, int] = dict.fromkeys(("pending", "processing", "completed", "failed"), 0)
+    out.update(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+    out.update(db.execute(
+        "SELECT 'dead', COUNT(*) FROM dlq UNION ALL SELECT 'workers', COUNT(*) FROM workers"
+    ).fetchall())
     return out
 
 
@@ -244,6 +599,20 @@ def workers_register(db: sqlite3.Connection, pid: int) -> None:
 
 
 def workers_heartbeat(db: sqlite3.Connection, pid: int) -> None:
-    db.execute("UPDATE workers SET last_heartbeat=? WHERE pid=?", (_stamp(), pid))
+    db.execute(_SQL_HEARTBEAT, (_stamp(), pid))
 
 
+def wal_maintenance(db: sqlite3.Connection, pid: int, stale_secs: int = 60) -> bool:
+    """
+    truncate the WAL + refresh planner stats. autocheckpoint never shrinks the file,
+    so someone has to do this; only the lowest live pid bothers (returns True if it did).
+    """
+    cutoff = _stamp() - stale_secs * 1000
+    row = db.execute(
+        "SELECT MIN(pid) FROM workers WHERE last_heartbeat >= ?", (cutoff,)
+    ).fetchone()
+    if row is None or row[0] != pid:
+        return False
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.execute("PRAGMA optimize")
+    return True
@@ -4,20 +4,26 @@ worker loop: picks jobs, executes, handles retries.
 
 from __future__ import annotations
 import os
+import re
+import select
+import shlex
 import signal
 import subprocess
 import time
 from subprocess import TimeoutExpired
-from datetime import datetime
 from typing import Optional
 
 from .storage import (
-    connect, init, claim_next_job, update_job_success, update_job_failure,
-    get_config, workers_register, workers_heartbeat
+    connect, connect_ro, close, init, immediate, claim_next_job, update_job_success, update_job_failure,
+    get_config, workers_register, workers_heartbeat, open_wakeup, consume_wakeup, drain_wakeup,
+    wal_maintenance, next_retry_in
 )
 
 # terminate signal flag — keep it simple; graceful enough for this scope
 _SHOULD_EXIT = False
+# WAL checkpoint / optimize cadence: whichever comes first
+_MAINT_EVERY_ITERS = 500
+_MAINT_EVERY_SECS = 300.0
 
 
 def _trap(signum, _frame):
@@ -26,78 +32,145 @@ def _trap(signum, _frame):
     _SHOULD_EXIT = True
 
 
+# anything the shell would interpret (pipes, redirects, vars, globs, ...) -> keep /bin/sh
+_SHELL_META = re.compile(r"[;&|<>$`\\\"'(){}\[\]*?~!#\n]")
+_PLAIN_SLEEP = re.compile(r"^sleep (\d+)$")
+
+
+def _run_command(command: str, timeout_sec: float) -> subprocess.CompletedProcess:
+    """
+    run a job command. plain `prog arg ...` commands are exec'd directly (one fork
+    instead of sh + child); anything using shell syntax still goes through shell=True.
+    """
+    if os.name == "posix" and not _SHELL_META.search(command):
+        m = _PLAIN_SLEEP.match(command)
+        if m:
+            # common enough to special-case: no process at all
+            secs = int(m.group(1))
+            if secs > timeout_sec:
+                time.sleep(timeout_sec)
+                raise TimeoutExpired(command, timeout_sec)
+            time.sleep(secs)
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        argv = shlex.split(command)
+        if argv and "=" not in argv[0]:     # FOO=bar cmd needs the shell
+            try:
+                return subprocess.run(argv, capture_output=True, text=True, timeout=timeout_sec)
+            except (FileNotFoundError, PermissionError):
+                # shell builtin (cd, exit, ...), missing binary or non-executable
+                # path -> let sh decide, so exit codes stay 127 / 126 as before
+                pass
+
+    return subprocess.run(command, shell=True, capture_output=True, text=True, timeout=timeout_sec)
+
+
 def run_worker(db_path: Optional[str] = None, heartbeat_sec: int = 2):
     # install signal handlers (Ctrl+C / kill) for graceful shutdown
     signal.signal(signal.SIGTERM, _trap)
     signal.signal(signal.SIGINT, _trap)
 
     init(db_path)
-    db = connect(db_path)
+    db = connect(db_path)          # claims / state changes
+    ro = connect_ro(db_path)       # config lookups (cached in storage); never contends for the write lock
 
     pid = os.getpid()
-    workers_register(db, pid)
-
-    # very small delay to avoid tight loop when idle
+    workers_register(db, pid)     # stamps the first heartbeat too
+    last_hb = time.monotonic()
+
+    # idle: block on the wake pipe (enqueue pokes it); the timeout is only a
+    # fallback so heartbeats + backoff retries still get picked up.
+    # no pipe (Windows) -> plain sleep as before
+    wake = open_wakeup(db_path)
+    if wake is not None:
+        wake_fd, _ = wake   # write end only held so the FIFO never reports EOF
+        # private self-pipe: signals land here, so shutdown cuts the idle wait short
+        # without eating a wakeup meant for another worker
+        sig_r, sig_w = os.pipe()
+        os.set_blocking(sig_r, False)
+        os.set_blocking(sig_w, False)
+        signal.set_wakeup_fd(sig_w, warn_on_full_buffer=False)
+    idle_wait = 5.0
     idle_sleep = 0.5
 
+    iters_since_checkpoint = 0
+    last_checkpoint = time.monotonic()
+
     while True:
         if _SHOULD_EXIT:      # exit point (graceful-ish)
             break
 
-        workers_heartbeat(db, pid)
-
-        job = claim_next_job(db, pid)
+        # keep the WAL bounded; elected worker only (see wal_maintenance)
+        iters_since_checkpoint += 1
+        if (iters_since_checkpoint >= _MAINT_EVERY_ITERS
+                or time.monotonic() - last_checkpoint >= _MAINT_EVERY_SECS):
+            wal_maintenance(db, pid)
+            iters_since_checkpoint = 0
+            last_checkpoint = time.monotonic()
+
+        # heartbeat at most every heartbeat_sec; when due it shares the claim's
+        # write transaction (one WAL commit per cycle)
+        with immediate(db):
+            if time.monotonic() - last_hb >= heartbeat_sec:
+                workers_heartbeat(db, pid)
+                last_hb = time.monotonic()
+            job = claim_next_job(db, pid)
+        if not job and wake is not None and drain_wakeup(wake_fd):
+            # pokes left over from enqueues made while every worker was busy would
+            # each buy one empty claim; drop them all, then look once more in case
+            # a job landed while we were draining
+            with immediate(db):
+                job = claim_next_job(db, pid)
         if not job:
-            time.sleep(idle_sleep)
+            if wake is None:
+                time.sleep(idle_sleep)
+            else:
+                # nobody pokes the pipe when a backoff expires, so don't sleep past it
+                wait = idle_wait
+                due = next_retry_in(ro)
+                if due is not None:
+                    wait = min(wait, due)
+                ready, _, _ = select.select([wake_fd, sig_r], [], [], wait)
+                if wake_fd in ready:
+                    consume_wakeup(wake_fd)
+                if sig_r in ready:
+                    os.read(sig_r, 512)   # signal already handled; just clear it
             continue
 
-        # actually run the command (shell=True because assignment uses echo/sleep)
+        # actually run the command (direct exec when it's a plain command, else shell=True)
         try:
-            # record start time
-            start_time = datetime.utcnow()
+            # record start time (wall clock for started_at, monotonic for the duration)
+            started_at = time.time_ns() // 1_000_000
+            t0 = time.monotonic()
             #timeout implementation
-            timeout_sec = job.get("timeout_seconds", 10) or 10  # default 10 seconds
+            timeout_sec = job["timeout_seconds"] or 10  # default 10 seconds
             try:
-                run_cmd = subprocess.run(
-                    job["command"],
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout_sec
-                )
+                run_cmd = _run_command(job["command"], timeout_sec)
             except TimeoutExpired:
-                end_time = datetime.utcnow()
-                duration_ms = int((end_time - start_time).total_seconds() * 1000)
-                db.execute(
-                    "UPDATE jobs SET started_at=?, duration_ms=?, updated_at=? WHERE id=?",
-                    (start_time.isoformat(), duration_ms, end_time.isoformat(), job["id"])
-                )
-                base = int(get_config(db, "backoff_base") or 2)
+                duration_ms = int((time.monotonic() - t0) * 1000)
+                base = int(get_config(ro, "backoff_base") or 2)
+                # timing + failure land in the same UPDATE (DLQ move handled in storage)
                 update_job_failure(
                     db,
                     job["id"],
                     job["attempts"],
                     job["max_retries"],
                     base,
-                    f"timeout after {timeout_sec}s"
+                    f"timeout after {timeout_sec}s",
+                    started_at=started_at,
+                    duration_ms=duration_ms
                 )
-                if job["attempts"] + 1 >= job["max_retries"]:
-                    move_to_dlq(db, job["id"], f"timeout after {timeout_sec}s")
                 continue 
 
-            end_time = datetime.utcnow()
-            duration_ms = int((end_time - start_time).total_seconds() * 1000)
+            duration_ms = int((time.monotonic() - t0) * 1000)
 
-            # update timing in DB
-            db.execute(
-                "UPDATE jobs SET started_at=?, duration_ms=?, updated_at=? WHERE id=?",
-                (start_time.isoformat(), duration_ms, end_time.isoformat(), job["id"])
-            )
-            # continue with existing success/failure logic
+            # continue with existing success/failure logic (timing rides on the same UPDATE)
             if run_cmd.returncode == 0:
-                update_job_success(db, job["id"])
+                update_job_success(
+                    db, job["id"], started_at=started_at, duration_ms=duration_ms
+                )
             else:
-                base = int(get_config(db, "backoff_base") or 2)
+                base = int(get_config(ro, "backoff_base") or 2)
                 err = (run_cmd.stderr or run_cmd.stdout or "").strip()[:300]
                 update_job_failure(
                     db,
@@ -105,15 +178,15 @@ def run_worker(db_path: Optional[str] = None, heartbeat_sec: int = 2):
                     job["attempts"],
                     job["max_retries"],
                     base,
-                    err or f"exit={run_cmd.returncode}"
+                    err or f"exit={run_cmd.returncode}",
+                    started_at=started_at,
+                    duration_ms=duration_ms
                 )
-                if job["attempts"] + 1 >= job["max_retries"]:
-                    move_to_dlq(db, job["id"], err)
 
         except Exception as boom:
             # unexpected execution error
-            base = int(get_config(db, "backoff_base") or 2)
+            base = int(get_config(ro, "backoff_base") or 2)
             update_job_failure(db, job["id"], job["attempts"], job["max_retries"], base, repr(boom))
 
-        # slight breather between jobs  ( no need to be hyper-aggressive )
-        time.sleep(0.10)
+    close(ro)
+    close(db)
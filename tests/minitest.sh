@@ -12,13 +12,50 @@ python -m queuctl1.cli enqueue '{"id":"ok1","command":"echo hello"}'
 python -m queuctl1.cli enqueue '{"id":"bad1","command":"bash -c \"exit 1\""}'
 python -m queuctl1.cli enqueue '{"id":"slow1","command":"sleep 1 && echo done"}'
 
+# bulk: JSON array + NDJSON file (blank line must be skipped)
+python -m queuctl1.cli enqueue '[{"id":"bulk1","command":"echo b1"},{"id":"bulk2","command":"echo b2"}]'
+NDJSON=$(mktemp)
+printf '{"id":"nd1","command":"echo n1"}\n\n{"id":"nd2","command":"echo n2"}\n' > "$NDJSON"
+python -m queuctl1.cli enqueue --file "$NDJSON"
+if python -m queuctl1.cli enqueue '{"id":"x","command":"true"}' --file "$NDJSON" 2>/dev/null; then
+    echo "FAIL: JSON string + --file should be rejected"; exit 1
+fi
+rm -f "$NDJSON"
+
+# command dispatch: builtin, missing binary and non-executable file fall back to
+# the shell; a bare `sleep N` runs in-process but still honours timeout_seconds
+NOEXEC=$(mktemp)
+python -m queuctl1.cli enqueue '{"id":"builtin1","command":"exit 3","max_retries":0}'
+python -m queuctl1.cli enqueue '{"id":"missing1","command":"no-such-binary-qctl arg","max_retries":0}'
+python -m queuctl1.cli enqueue "{\"id\":\"noexec1\",\"command\":\"$NOEXEC\",\"max_retries\":0}"
+python -m queuctl1.cli enqueue '{"id":"sleepto1","command":"sleep 5","timeout_seconds":1,"max_retries":0}'
+
 # give it a few seconds to churn, including retries
 sleep 18
 
 python -m queuctl1.cli status
 python -m queuctl1.cli dlq list || true
+
+python -m queuctl1.cli list --state completed | python -c '
+import json, sys
+done = {j["id"] for j in json.load(sys.stdin)}
+missing = {"bulk1", "bulk2", "nd1", "nd2"} - done
+assert not missing, f"bulk jobs not completed: {sorted(missing)}"
+'
+
+python -m queuctl1.cli dlq list | python -c '
+import json, sys
+dead = {j["id"]: j["last_error"] for j in json.load(sys.stdin)}
+assert dead.get("builtin1") == "exit=3", dead.get("builtin1")
+assert "not found" in dead.get("missing1", ""), dead.get("missing1")
+assert "ermission denied" in dead.get("noexec1", ""), dead.get("noexec1")
+assert dead.get("sleepto1") == "timeout after 1s", dead.get("sleepto1")
+'
+rm -f "$NOEXEC"
+
 python -m queuctl1.cli dlq retry bad1 || true
 
+pkill -TERM -P $WPID || true   # workers first; a bare kill on the parent leaves them running
 kill $WPID || true
 wait $WPID || true
 echo "mini test done"